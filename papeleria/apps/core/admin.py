@@ -1,10 +1,12 @@
 # core/admin.py
 
 from django.contrib import admin
-from .models import Categoria, Producto, Venta, DetalleVenta
+from .models import Categoria, Producto, Venta, DetalleVenta, CierreInventario, DetalleCierreInventario
 
 # Registra tus modelos
 admin.site.register(Categoria)
 admin.site.register(Producto)
 admin.site.register(Venta)
-admin.site.register(DetalleVenta)
\ No newline at end of file
+admin.site.register(DetalleVenta)
+admin.site.register(CierreInventario)
+admin.site.register(DetalleCierreInventario)
\ No newline at end of file
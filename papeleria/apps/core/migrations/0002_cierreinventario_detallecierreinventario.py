@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierreInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_inicio', models.DateField()),
+                ('fecha_fin', models.DateField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('valor_stock', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('costo_ventas', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('margen_bruto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DetalleCierreInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre_producto', models.CharField(max_length=200)),
+                ('categoria', models.CharField(blank=True, max_length=100)),
+                ('stock', models.IntegerField()),
+                ('valor_stock', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('unidades_vendidas', models.IntegerField()),
+                ('ingresos', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('costo_ventas', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('margen_bruto', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('cierre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='detalles', to='core.cierreinventario')),
+                ('producto', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.producto')),
+            ],
+        ),
+    ]
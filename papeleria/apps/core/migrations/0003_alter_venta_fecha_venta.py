@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_cierreinventario_detallecierreinventario'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='venta',
+            name='fecha_venta',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -43,7 +43,7 @@ class Venta(models.Model):
     """
     Modelo para registrar una transacción de venta completa.
     """
-    fecha_venta = models.DateTimeField(auto_now_add=True)
+    fecha_venta = models.DateTimeField(auto_now_add=True, db_index=True)
     total = models.DecimalField(max_digits=10, decimal_places=2)
 
     def __str__(self):
@@ -59,4 +59,46 @@ class DetalleVenta(models.Model):
     precio_unitario = models.DecimalField(max_digits=10, decimal_places=2)
 
     def __str__(self):
-        return f"{self.cantidad} x {self.producto.nombre}"
\ No newline at end of file
+        return f"{self.cantidad} x {self.producto.nombre}"
+
+
+# ======================================================================
+# MODELOS DE CIERRES DE INVENTARIO
+# ======================================================================
+
+class CierreInventario(models.Model):
+    """
+    Foto del reporte de inventario y margen para un periodo (ej. cierre de mes).
+    Las ventas, ingresos y costo de lo vendido son los del periodo, pero el stock y su
+    valor son los que había al guardar el cierre (fecha_creacion), no al día fecha_fin:
+    el sistema no guarda historial de stock. Guárdalo el mismo día del cierre.
+    """
+    fecha_inicio = models.DateField()
+    fecha_fin = models.DateField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    valor_stock = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    costo_ventas = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    margen_bruto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"Cierre {self.fecha_inicio.strftime('%d/%m/%Y')} - {self.fecha_fin.strftime('%d/%m/%Y')}"
+
+class DetalleCierreInventario(models.Model):
+    """
+    Valores de un producto dentro de un cierre de inventario.
+    Se guardan el nombre y la categoría para que el cierre no cambie si el producto se edita.
+    """
+    cierre = models.ForeignKey(CierreInventario, on_delete=models.CASCADE, related_name='detalles')
+    producto = models.ForeignKey(Producto, on_delete=models.SET_NULL, null=True)
+    nombre_producto = models.CharField(max_length=200)
+    categoria = models.CharField(max_length=100, blank=True)
+    stock = models.IntegerField()
+    valor_stock = models.DecimalField(max_digits=14, decimal_places=2)
+    unidades_vendidas = models.IntegerField()
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2)
+    costo_ventas = models.DecimalField(max_digits=14, decimal_places=2)
+    margen_bruto = models.DecimalField(max_digits=14, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.nombre_producto} ({self.cierre})"
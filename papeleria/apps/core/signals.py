@@ -0,0 +1,33 @@
+# apps/core/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Categoria, Producto, DetalleVenta
+from .utils import invalidar_estadisticas_categorias
+
+# ======================================================================
+# INVALIDACIÓN DEL CACHÉ DE ESTADÍSTICAS DE CATEGORÍAS
+# ======================================================================
+# Cubre cualquier escritura (vistas, admin, shell). Las llamadas a .update()
+# no envían señales, por eso recategorizar_productos invalida explícitamente.
+
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+@receiver(post_save, sender=DetalleVenta)
+@receiver(post_delete, sender=DetalleVenta)
+def invalidar_estadisticas_al_cambiar(sender, **kwargs):
+    """
+    Borra las estadísticas de categorías cuando la transacción se confirma,
+    registrando el borrado una sola vez por transacción (una importación o una
+    venta con muchas líneas hace un solo DELETE en el caché, no uno por fila).
+    """
+    conexion = transaction.get_connection()
+    # run_on_commit guarda los callbacks pendientes de la transacción actual; si el
+    # savepoint donde se registró se revierte, Django lo quita y se vuelve a registrar.
+    if any(callback is invalidar_estadisticas_categorias for _, callback, _ in conexion.run_on_commit):
+        return
+    transaction.on_commit(invalidar_estadisticas_categorias)
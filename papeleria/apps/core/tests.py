@@ -1,3 +1,399 @@
-from django.test import TestCase
+import csv
+import io
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Categoria, Producto, Venta, DetalleVenta, CierreInventario
+from .utils import (
+    obtener_estadisticas_categorias,
+    recategorizar_productos,
+    compilar_reglas_categoria,
+    asignar_categoria,
+    inventario_por_producto,
+    inventario_por_categoria,
+    crear_cierre_inventario,
+)
+
+
+class DatosInventarioMixin:
+    """
+    Catálogo pequeño con ventas recientes y una venta antigua (fuera de 30 días).
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.papeleria = Categoria.objects.create(nombre='Papelería')
+        cls.dulces = Categoria.objects.create(nombre='Dulces')
+
+        cls.cuaderno = Producto.objects.create(
+            nombre='Cuaderno', categoria=cls.papeleria, stock=10,
+            costo_compra=Decimal('2.00'), precio_venta=Decimal('5.00'),
+        )
+        cls.lapiz = Producto.objects.create(
+            nombre='Lápiz', categoria=cls.papeleria, stock=4,
+            costo_compra=None, precio_venta=Decimal('3.00'),
+        )
+        cls.chicle = Producto.objects.create(
+            nombre='Chicle', categoria=cls.dulces, stock=3,
+            costo_compra=Decimal('1.00'), precio_venta=Decimal('2.00'),
+        )
+        cls.tijera = Producto.objects.create(
+            nombre='Tijera', categoria=None, stock=1,
+            costo_compra=Decimal('10.00'), precio_venta=Decimal('15.00'),
+        )
+
+        venta = Venta.objects.create(total=Decimal('27.00'))
+        DetalleVenta.objects.create(venta=venta, producto=cls.cuaderno, cantidad=2, precio_unitario=Decimal('5.00'))
+        DetalleVenta.objects.create(venta=venta, producto=cls.cuaderno, cantidad=1, precio_unitario=Decimal('6.00'))
+        DetalleVenta.objects.create(venta=venta, producto=cls.lapiz, cantidad=1, precio_unitario=Decimal('3.00'))
+        DetalleVenta.objects.create(venta=venta, producto=cls.chicle, cantidad=4, precio_unitario=Decimal('2.00'))
+
+        venta_antigua = Venta.objects.create(total=Decimal('50.00'))
+        DetalleVenta.objects.create(venta=venta_antigua, producto=cls.cuaderno, cantidad=10, precio_unitario=Decimal('5.00'))
+        Venta.objects.filter(pk=venta_antigua.pk).update(fecha_venta=timezone.now() - timedelta(days=45))
+
+        cls.fecha_fin = timezone.now().date()
+        cls.fecha_inicio = cls.fecha_fin - timedelta(days=7)
+
+    def setUp(self):
+        cache.clear()
+
+
+class EstadisticasCategoriasTests(DatosInventarioMixin, TestCase):
+
+    def test_estadisticas_no_multiplican_stock_por_ventas(self):
+        stats = {c.nombre: c for c in obtener_estadisticas_categorias()}
+
+        self.assertEqual(stats['Papelería'].total_productos, 2)
+        self.assertEqual(stats['Papelería'].valor_stock, Decimal('20.00'))
+        self.assertEqual(stats['Papelería'].ingresos_30_dias, Decimal('19.00'))
+        self.assertEqual(stats['Dulces'].total_productos, 1)
+        self.assertEqual(stats['Dulces'].valor_stock, Decimal('3.00'))
+        self.assertEqual(stats['Dulces'].ingresos_30_dias, Decimal('8.00'))
+
+    def test_recategorizar_actualiza_e_invalida_cache(self):
+        obtener_estadisticas_categorias()
+
+        actualizados = recategorizar_productos(self.dulces, categoria_origen=self.papeleria, nombre='cuader')
+
+        self.assertEqual(actualizados, 1)
+        self.cuaderno.refresh_from_db()
+        self.assertEqual(self.cuaderno.categoria, self.dulces)
+        stats = {c.nombre: c for c in obtener_estadisticas_categorias()}
+        self.assertEqual(stats['Dulces'].total_productos, 2)
+        self.assertEqual(stats['Papelería'].total_productos, 1)
+
+    def test_recategorizar_sin_filtros_falla(self):
+        with self.assertRaises(ValueError):
+            recategorizar_productos(self.dulces)
+
+
+class InvalidacionCacheTests(TransactionTestCase):
+    """
+    Las señales invalidan el caché al confirmar la transacción, por eso estas
+    pruebas usan TransactionTestCase (TestCase nunca confirma).
+    """
+    def setUp(self):
+        cache.clear()
+        self.dulces = Categoria.objects.create(nombre='Dulces')
+
+    def test_guardar_producto_invalida_cache(self):
+        obtener_estadisticas_categorias()
+
+        Producto.objects.create(nombre='Paleta', categoria=self.dulces, stock=1, precio_venta=Decimal('1.00'))
+
+        stats = {c.nombre: c for c in obtener_estadisticas_categorias()}
+        self.assertEqual(stats['Dulces'].total_productos, 1)
+
+    def test_invalidacion_una_sola_vez_por_transaccion(self):
+        with mock.patch('apps.core.utils.cache') as cache_mock:
+            with transaction.atomic():
+                for i in range(5):
+                    Producto.objects.create(nombre=f'Paleta {i}', categoria=self.dulces, precio_venta=Decimal('1.00'))
+                Categoria.objects.create(nombre='Regalos')
+
+        self.assertEqual(cache_mock.delete.call_count, 1)
+
+    def test_transaccion_revertida_no_bloquea_invalidaciones_siguientes(self):
+        with mock.patch('apps.core.utils.cache') as cache_mock:
+            with transaction.atomic():
+                Producto.objects.create(nombre='Paleta', categoria=self.dulces, precio_venta=Decimal('1.00'))
+                transaction.set_rollback(True)
+            self.assertEqual(cache_mock.delete.call_count, 0)
+
+            with transaction.atomic():
+                Producto.objects.create(nombre='Chicle', categoria=self.dulces, precio_venta=Decimal('1.00'))
+        self.assertEqual(cache_mock.delete.call_count, 1)
+
+
+class RecategorizarProductosViewTests(DatosInventarioMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        usuario = User.objects.create_user('vendedor', password='secreto')
+        self.client.force_login(usuario)
+        self.url = reverse('core:categoria-recategorizar')
+
+    def ultimo_mensaje(self, response):
+        return [str(m) for m in get_messages(response.wsgi_request)][-1]
+
+    def test_requiere_sesion(self):
+        self.client.logout()
+        response = self.client.post(self.url, {'categoria_destino': self.dulces.pk, 'ids': str(self.cuaderno.pk)})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response.url)
+
+    def test_mueve_productos_por_ids(self):
+        response = self.client.post(self.url, {
+            'categoria_destino': self.dulces.pk,
+            'ids': f'{self.cuaderno.pk}, {self.lapiz.pk}',
+        })
+
+        self.assertRedirects(response, reverse('core:categoria-list'), fetch_redirect_response=False)
+        self.assertEqual(self.ultimo_mensaje(response), '2 producto(s) movido(s) a "Dulces".')
+        self.assertEqual(Producto.objects.filter(categoria=self.dulces).count(), 3)
+
+    def test_destino_invalido_no_da_error_500(self):
+        for valor in ('', 'abc', '²', '-1'):
+            with self.subTest(valor=valor):
+                response = self.client.post(self.url, {'categoria_destino': valor, 'nombre': 'a'})
+                self.assertEqual(response.status_code, 302)
+                self.assertEqual(self.ultimo_mensaje(response), 'Selecciona una categoría destino válida.')
+
+    def test_origen_invalido_o_inexistente(self):
+        response = self.client.post(self.url, {'categoria_destino': self.dulces.pk, 'categoria_origen': '²'})
+        self.assertEqual(self.ultimo_mensaje(response), 'La categoría de origen no es válida.')
+
+        response = self.client.post(self.url, {'categoria_destino': self.dulces.pk, 'categoria_origen': '999999'})
+        self.assertEqual(self.ultimo_mensaje(response), 'La categoría de origen no existe.')
+
+    def test_ids_invalidos_muestran_mensaje_en_espanol(self):
+        response = self.client.post(self.url, {'categoria_destino': self.dulces.pk, 'ids': '1,²,x'})
+
+        self.assertEqual(
+            self.ultimo_mensaje(response),
+            'Los siguientes IDs no son válidos: ², x. Usa solo números separados por coma.',
+        )
+        self.assertEqual(Producto.objects.filter(categoria=self.dulces).count(), 1)
+
+    def test_sin_filtros(self):
+        response = self.client.post(self.url, {'categoria_destino': self.dulces.pk})
+        self.assertEqual(
+            self.ultimo_mensaje(response),
+            'No se pudo recategorizar: Debes indicar al menos un filtro para recategorizar.',
+        )
+
+
+class ReglasCategoriaTests(TestCase):
+
+    def setUp(self):
+        self.reglas = compilar_reglas_categoria()
+
+    def test_palabra_clave_asigna_dulces(self):
+        self.assertEqual(asignar_categoria('Chocolate Abuelita', self.reglas), 'Dulces')
+        self.assertEqual(asignar_categoria('Barra de CHOCOLATE', self.reglas), 'Dulces')
+
+    def test_prefijo_asigna_dulces(self):
+        self.assertEqual(asignar_categoria('DUL-001 Surtido', self.reglas), 'Dulces')
+        self.assertEqual(asignar_categoria('Surtido DUL-001', self.reglas), 'Papelería')
+
+    def test_palabra_clave_dentro_de_otra_palabra_no_coincide(self):
+        self.assertEqual(asignar_categoria('Cuaderno adulce', self.reglas), 'Papelería')
+
+    def test_sin_coincidencia_usa_categoria_por_defecto(self):
+        self.assertEqual(asignar_categoria('Cuaderno profesional', self.reglas), 'Papelería')
+        self.assertEqual(asignar_categoria('Cuaderno', self.reglas, por_defecto='Otros'), 'Otros')
+
+
+class ReporteInventarioTests(DatosInventarioMixin, TestCase):
+
+    def test_inventario_por_producto_filtra_por_fechas(self):
+        filas = {f['nombre']: f for f in inventario_por_producto(self.fecha_inicio, self.fecha_fin)}
+
+        cuaderno = filas['Cuaderno']
+        self.assertEqual(cuaderno['valor_stock'], Decimal('20.00'))
+        self.assertEqual(cuaderno['unidades_vendidas'], 3)
+        self.assertEqual(cuaderno['ingresos'], Decimal('16.00'))
+        self.assertEqual(cuaderno['costo_ventas'], Decimal('6.00'))
+        self.assertEqual(cuaderno['margen_bruto'], Decimal('10.00'))
+        self.assertFalse(cuaderno['sin_costo'])
+
+        lapiz = filas['Lápiz']
+        self.assertEqual(lapiz['valor_stock'], Decimal('0'))
+        self.assertEqual(lapiz['costo_ventas'], Decimal('0'))
+        self.assertEqual(lapiz['margen_bruto'], Decimal('3.00'))
+        self.assertTrue(lapiz['sin_costo'])
+
+        tijera = filas['Tijera']
+        self.assertEqual(tijera['unidades_vendidas'], 0)
+        self.assertEqual(tijera['ingresos'], Decimal('0'))
+
+    def test_rango_incluye_todo_el_ultimo_dia(self):
+        fin = self.fecha_inicio - timedelta(days=1)
+        venta = Venta.objects.create(total=Decimal('10.00'))
+        DetalleVenta.objects.create(venta=venta, producto=self.tijera, cantidad=1, precio_unitario=Decimal('10.00'))
+        ultimo_instante = timezone.make_aware(datetime.combine(fin, time.max))
+        Venta.objects.filter(pk=venta.pk).update(fecha_venta=ultimo_instante)
+
+        filas = {f['nombre']: f for f in inventario_por_producto(fin, fin)}
+        self.assertEqual(filas['Tijera']['unidades_vendidas'], 1)
+        filas = {f['nombre']: f for f in inventario_por_producto(fin + timedelta(days=1), self.fecha_fin)}
+        self.assertEqual(filas['Tijera']['unidades_vendidas'], 0)
+
+    def test_inventario_por_categoria(self):
+        filas = {f['categoria']: f for f in inventario_por_categoria(self.fecha_inicio, self.fecha_fin)}
+
+        self.assertEqual(filas['Papelería'], {
+            'categoria': 'Papelería',
+            'total_productos': 2,
+            'sin_costo': 1,
+            'valor_stock': Decimal('20.00'),
+            'unidades_vendidas': 4,
+            'ingresos': Decimal('19.00'),
+            'costo_ventas': Decimal('6.00'),
+            'margen_bruto': Decimal('13.00'),
+        })
+        self.assertEqual(filas['Dulces']['valor_stock'], Decimal('3.00'))
+        self.assertEqual(filas['Dulces']['margen_bruto'], Decimal('4.00'))
+        self.assertEqual(filas['Sin categoría']['valor_stock'], Decimal('10.00'))
+        self.assertEqual(filas['Sin categoría']['ingresos'], 0)
+
+    def test_crear_cierre_inventario_guarda_detalles_y_totales(self):
+        cierre = crear_cierre_inventario(self.fecha_inicio, self.fecha_fin, tamano_lote=3)
+
+        cierre = CierreInventario.objects.get(pk=cierre.pk)
+        self.assertEqual(cierre.detalles.count(), 4)
+        self.assertEqual(cierre.valor_stock, Decimal('33.00'))
+        self.assertEqual(cierre.ingresos, Decimal('27.00'))
+        self.assertEqual(cierre.costo_ventas, Decimal('10.00'))
+        self.assertEqual(cierre.margen_bruto, Decimal('17.00'))
+
+
+class ReporteInventarioViewTests(DatosInventarioMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        usuario = User.objects.create_user('contador', password='secreto')
+        self.client.force_login(usuario)
+        self.url = reverse('core:reporte-inventario')
+        self.rango = {
+            'fecha_inicio': self.fecha_inicio.isoformat(),
+            'fecha_fin': self.fecha_fin.isoformat(),
+        }
+
+    def ultimo_mensaje(self, response):
+        return [str(m) for m in get_messages(response.wsgi_request)][-1]
+
+    def test_requiere_sesion(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response.url)
+
+    def test_reporte_muestra_totales_y_aviso_sin_costo(self):
+        response = self.client.get(self.url, self.rango)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['totales']['margen_bruto'], Decimal('17.00'))
+        self.assertEqual(response.context['totales']['sin_costo'], 1)
+        self.assertContains(response, '1 producto(s) no tienen costo de compra')
+
+    def test_rango_invertido_en_get_muestra_error(self):
+        response = self.client.get(self.url, {'fecha_inicio': '2025-02-10', 'fecha_fin': '2025-01-01'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'La fecha de inicio no puede ser posterior a la fecha de fin.')
+        self.assertEqual(response.context['fecha_fin'], timezone.now().date())
+
+    def test_csv_se_transmite_por_filas(self):
+        response = self.client.get(self.url, {**self.rango, 'formato': 'csv'})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="inventario_', response['Content-Disposition'])
+        filas = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual(filas[0][0], 'Producto')
+        self.assertEqual(filas[0][-1], 'Sin Costo de Compra')
+        self.assertEqual(len(filas), 5)
+        lapiz = next(f for f in filas if f[0] == 'Lápiz')
+        self.assertEqual(lapiz[-1], 'Sí')
+
+    def test_csv_con_fechas_invalidas_redirige(self):
+        response = self.client.get(self.url, {'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-02-30', 'formato': 'csv'})
+
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertEqual(self.ultimo_mensaje(response), 'Indica una fecha de inicio y una fecha de fin válidas.')
+
+    def test_guardar_cierre(self):
+        response = self.client.post(self.url, self.rango)
+
+        self.assertEqual(response.status_code, 302)
+        cierre = CierreInventario.objects.get()
+        self.assertEqual((cierre.fecha_inicio, cierre.fecha_fin), (self.fecha_inicio, self.fecha_fin))
+        self.assertEqual(cierre.margen_bruto, Decimal('17.00'))
+
+    def test_cierre_sin_fechas_o_con_fechas_malas_no_se_guarda(self):
+        casos = [
+            ({}, 'No se guardó el cierre: Indica la fecha de inicio y la fecha de fin del cierre.'),
+            ({'fecha_inicio': '2025-01-01'}, 'No se guardó el cierre: Indica una fecha de inicio y una fecha de fin válidas.'),
+            ({'fecha_inicio': '2025-01-01', 'fecha_fin': 'ayer'}, 'No se guardó el cierre: Indica una fecha de inicio y una fecha de fin válidas.'),
+            ({'fecha_inicio': '2025-02-01', 'fecha_fin': '2025-01-01'},
+             'No se guardó el cierre: La fecha de inicio no puede ser posterior a la fecha de fin.'),
+        ]
+        for datos, mensaje in casos:
+            with self.subTest(datos=datos):
+                response = self.client.post(self.url, datos)
+                self.assertRedirects(response, self.url, fetch_redirect_response=False)
+                self.assertEqual(self.ultimo_mensaje(response), mensaje)
+        self.assertFalse(CierreInventario.objects.exists())
+
+
+class UploadCSVViewTests(TestCase):
+    columnas = 'Producto,Cantidad,Precio Unitario (Costo),Precio de Venta Unitario (30% Margen)'
+
+    def subir(self, *filas):
+        contenido = '\n'.join((self.columnas,) + filas).encode('utf-8')
+        archivo = SimpleUploadedFile('productos.csv', contenido, content_type='text/csv')
+        return self.client.post(reverse('core:upload_csv'), {'csv_file': archivo})
+
+    def test_asigna_categoria_segun_reglas(self):
+        response = self.subir(
+            'Chocolate Abuelita,5,$10.00,$13.00',
+            'DUL-002 Surtido,2,$1.00,$1.30',
+            'Cuaderno profesional,8,"$1,200.00","$1,560.00"',
+        )
+
+        self.assertRedirects(response, reverse('core:upload_csv'), fetch_redirect_response=False)
+        categorias = dict(Producto.objects.values_list('nombre', 'categoria__nombre'))
+        self.assertEqual(categorias, {
+            'Chocolate Abuelita': 'Dulces',
+            'DUL-002 Surtido': 'Dulces',
+            'Cuaderno profesional': 'Papelería',
+        })
+        self.assertEqual(Categoria.objects.count(), 2)
+        self.assertEqual(Producto.objects.get(nombre='Cuaderno profesional').costo_compra, Decimal('1200.00'))
+
+    def test_solo_crea_las_categorias_usadas(self):
+        self.subir('Cuaderno,1,$1.00,$1.30')
+
+        self.assertEqual(list(Categoria.objects.values_list('nombre', flat=True)), ['Papelería'])
+
+    def test_fila_invalida_no_guarda_nada(self):
+        response = self.subir(
+            'Cuaderno,1,$1.00,$1.30',
+            'Lápiz,no-es-numero,$1.00,$1.30',
+        )
+
+        mensajes = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertEqual(len(mensajes), 1)
+        self.assertIn('no-es-numero', mensajes[0])
+        self.assertFalse(Producto.objects.exists())
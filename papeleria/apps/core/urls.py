@@ -23,7 +23,9 @@ urlpatterns = [
     path('productos/editar/<int:pk>/', views.ProductoUpdateView.as_view(), name='producto-edit'),
     path('productos/<int:pk>/', views.producto_detail_json, name='producto-detail-json'),
     path('reportes/ventas/', views.ReportesVentaView.as_view(), name='reportes-ventas'),
+    path('reportes/inventario/', views.ReporteInventarioView.as_view(), name='reporte-inventario'),
     path('categorias/delete/<int:pk>/', views.CategoriaDeleteView.as_view(), name='categoria-delete'),
+    path('categorias/recategorizar/', views.RecategorizarProductosView.as_view(), name='categoria-recategorizar'),
     path('eliminar-venta/<int:pk>/', views.VentaDeleteView.as_view(), name='eliminar-venta'),
     path('ventas/', views.VentasListView.as_view(), name='ventas-list'),
 
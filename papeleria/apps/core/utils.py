@@ -1,7 +1,18 @@
 # core/utils.py
 
+import re
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
 from django.core.mail import send_mail
+from django.core.cache import cache
+from django.db import transaction
 from django.conf import settings
+from django.db.models import BooleanField, Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Categoria, DetalleVenta, Producto, CierreInventario, DetalleCierreInventario
 
 def enviar_notificacion_stock_cero(producto_nombre):
     """
@@ -21,4 +32,266 @@ def enviar_notificacion_stock_cero(producto_nombre):
         send_mail(subject, message, from_email, recipient_list)
         print(f"Notificación de stock enviada para el producto: {producto_nombre}")
     except Exception as e:
-        print(f"Error al enviar la notificación por correo: {e}")
\ No newline at end of file
+        print(f"Error al enviar la notificación por correo: {e}")
+
+# ======================================================================
+# UTILIDADES DE CATEGORÍAS
+# ======================================================================
+
+# En producción el caché es compartido (ver CACHES en settings/prod.py); con el
+# LocMemCache por defecto, invalidar solo afecta al proceso que hizo el cambio.
+CACHE_KEY_ESTADISTICAS_CATEGORIAS = 'core:categorias:estadisticas'
+CACHE_TIMEOUT_ESTADISTICAS_CATEGORIAS = 60 * 10
+
+# Reglas para asignar categoría al importar productos.
+# Cada regla es (categoría, palabras clave, prefijos); la primera que coincide gana.
+REGLAS_CATEGORIA = (
+    ('Dulces',
+     ('dulce', 'chocolate', 'caramelo', 'paleta', 'chicle', 'gomita', 'bombon', 'bombón', 'galleta', 'mazapan', 'mazapán'),
+     ('DUL-',)),
+)
+CATEGORIA_POR_DEFECTO = 'Papelería'
+
+
+def obtener_estadisticas_categorias():
+    """
+    Devuelve las categorías con su número de productos, valor del stock (a costo)
+    e ingresos de los últimos 30 días, calculados en una sola consulta y cacheados.
+    """
+    categorias = cache.get(CACHE_KEY_ESTADISTICAS_CATEGORIAS)
+    if categorias is not None:
+        return categorias
+
+    dinero = DecimalField(max_digits=14, decimal_places=2)
+    desde = timezone.now() - timedelta(days=30)
+
+    # Los ingresos van en una subconsulta para que el JOIN con las ventas
+    # no multiplique las filas de productos al sumar el valor del stock.
+    ingresos = DetalleVenta.objects.filter(
+        producto__categoria=OuterRef('pk'),
+        venta__fecha_venta__gte=desde,
+    ).values('producto__categoria').annotate(
+        total=Sum(ExpressionWrapper(F('cantidad') * F('precio_unitario'), output_field=dinero))
+    ).values('total')
+
+    categorias = list(
+        Categoria.objects.annotate(
+            total_productos=Count('productos'),
+            valor_stock=Coalesce(
+                Sum(ExpressionWrapper(F('productos__stock') * F('productos__costo_compra'), output_field=dinero)),
+                0, output_field=dinero,
+            ),
+            ingresos_30_dias=Coalesce(Subquery(ingresos, output_field=dinero), 0, output_field=dinero),
+        ).order_by('nombre')
+    )
+    cache.set(CACHE_KEY_ESTADISTICAS_CATEGORIAS, categorias, CACHE_TIMEOUT_ESTADISTICAS_CATEGORIAS)
+    return categorias
+
+
+def invalidar_estadisticas_categorias():
+    """
+    Borra del caché las estadísticas de categorías. Las señales de signals.py
+    la llaman ante cualquier cambio en productos, categorías o ventas.
+    """
+    cache.delete(CACHE_KEY_ESTADISTICAS_CATEGORIAS)
+
+
+def recategorizar_productos(categoria_destino, ids=None, categoria_origen=None, nombre=None):
+    """
+    Mueve a `categoria_destino` los productos que cumplan el filtro con un solo UPDATE.
+    Se puede filtrar por lista de ids, categoría de origen y/o texto en el nombre.
+    Devuelve el número de productos actualizados.
+    """
+
+    if not ids and categoria_origen is None and not nombre:
+        raise ValueError('Debes indicar al menos un filtro para recategorizar.')
+
+    productos = Producto.objects.all()
+    if ids:
+        productos = productos.filter(pk__in=ids)
+    if categoria_origen is not None:
+        productos = productos.filter(categoria=categoria_origen)
+    if nombre:
+        productos = productos.filter(nombre__icontains=nombre)
+
+    actualizados = productos.exclude(categoria=categoria_destino).update(categoria=categoria_destino)
+    if actualizados:
+        invalidar_estadisticas_categorias()
+    return actualizados
+
+
+def compilar_reglas_categoria(reglas=REGLAS_CATEGORIA):
+    """
+    Compila cada regla en una sola expresión regular. Se hace una vez por importación.
+    """
+    compiladas = []
+    for categoria, palabras, prefijos in reglas:
+        partes = []
+        if prefijos:
+            partes.append(r'^(?:%s)' % '|'.join(re.escape(p) for p in prefijos))
+        if palabras:
+            partes.append(r'\b(?:%s)' % '|'.join(re.escape(p) for p in palabras))
+        if partes:
+            compiladas.append((categoria, re.compile('|'.join(partes), re.IGNORECASE)))
+    return compiladas
+
+
+def asignar_categoria(nombre_producto, reglas_compiladas, por_defecto=CATEGORIA_POR_DEFECTO):
+    """
+    Devuelve el nombre de la categoría de la primera regla que coincide con el producto.
+    """
+    for categoria, patron in reglas_compiladas:
+        if patron.search(nombre_producto):
+            return categoria
+    return por_defecto
+
+
+# ======================================================================
+# UTILIDADES DE REPORTES DE INVENTARIO Y MARGEN
+# ======================================================================
+
+# El costo de lo vendido usa el costo_compra actual del producto, porque
+# DetalleVenta no guarda el costo al momento de la venta.
+
+def limites_rango_fechas(fecha_inicio, fecha_fin):
+    """
+    Convierte un rango de fechas inclusivo en [desde, hasta) de fecha y hora, para
+    filtrar fecha_venta directamente (sin __date) y poder usar su índice.
+    """
+    desde = timezone.make_aware(datetime.combine(fecha_inicio, time.min))
+    hasta = timezone.make_aware(datetime.combine(fecha_fin + timedelta(days=1), time.min))
+    return desde, hasta
+
+
+def ventas_en_rango(fecha_inicio, fecha_fin):
+    """Detalles de venta cuyas ventas caen dentro del rango de fechas."""
+    desde, hasta = limites_rango_fechas(fecha_inicio, fecha_fin)
+    return DetalleVenta.objects.filter(venta__fecha_venta__gte=desde, venta__fecha_venta__lt=hasta)
+
+
+def inventario_por_producto(fecha_inicio, fecha_fin, chunk_size=2000):
+    """
+    Devuelve, fila por fila, cada producto con su valor de stock, unidades vendidas,
+    ingresos, costo de lo vendido y margen bruto en el rango de fechas.
+    Todo sale de una sola consulta: las ventas se suman en dos subconsultas por
+    producto limitadas al rango, así no se recorre todo el historial de ventas.
+    El costo de lo vendido (unidades x costo_compra) y el margen se derivan por fila
+    de esos valores, para no repetir las subconsultas en el SQL.
+    Los productos sin costo_compra cuentan con valor de stock y costo 0 (su margen es
+    igual a sus ingresos) y se marcan con sin_costo=True.
+    """
+    dinero = DecimalField(max_digits=14, decimal_places=2)
+    cero = Value(0, output_field=dinero)
+    ventas = ventas_en_rango(fecha_inicio, fecha_fin).filter(
+        producto=OuterRef('pk'),
+    ).values('producto')
+
+    unidades = ventas.annotate(total=Sum('cantidad')).values('total')
+    ingresos = ventas.annotate(
+        total=Sum(ExpressionWrapper(F('cantidad') * F('precio_unitario'), output_field=dinero))
+    ).values('total')
+
+    filas = Producto.objects.annotate(
+        valor_stock=Coalesce(
+            ExpressionWrapper(F('stock') * F('costo_compra'), output_field=dinero), cero,
+        ),
+        unidades_vendidas=Coalesce(Subquery(unidades), 0),
+        ingresos=Coalesce(Subquery(ingresos, output_field=dinero), cero),
+        sin_costo=ExpressionWrapper(Q(costo_compra__isnull=True), output_field=BooleanField()),
+    ).values(
+        'id', 'nombre', 'categoria__nombre', 'stock', 'costo_compra', 'precio_venta',
+        'valor_stock', 'unidades_vendidas', 'ingresos', 'sin_costo',
+    ).order_by('categoria__nombre', 'nombre')
+
+    for fila in filas.iterator(chunk_size=chunk_size):
+        fila['costo_ventas'] = fila['unidades_vendidas'] * (fila['costo_compra'] or Decimal('0.00'))
+        fila['margen_bruto'] = fila['ingresos'] - fila['costo_ventas']
+        yield fila
+
+
+def inventario_por_categoria(fecha_inicio, fecha_fin):
+    """
+    Devuelve una fila por categoría (incluida "Sin categoría") con los mismos totales,
+    más sin_costo: cuántos productos no tienen costo_compra y por eso inflan el margen.
+    Usa dos consultas agregadas: una sobre productos (stock) y otra sobre detalles de
+    venta (ventas), para que el JOIN con las ventas no multiplique el valor del stock.
+    """
+    dinero = DecimalField(max_digits=14, decimal_places=2)
+
+    stock = Producto.objects.values('categoria_id', 'categoria__nombre').annotate(
+        total_productos=Count('id'),
+        sin_costo=Count('id', filter=Q(costo_compra__isnull=True)),
+        valor_stock=Coalesce(
+            Sum(ExpressionWrapper(F('stock') * F('costo_compra'), output_field=dinero)),
+            Value(0, output_field=dinero),
+        ),
+    ).order_by()
+
+    ventas = ventas_en_rango(fecha_inicio, fecha_fin).values('producto__categoria_id').annotate(
+        unidades_vendidas=Sum('cantidad'),
+        ingresos=Sum(ExpressionWrapper(F('cantidad') * F('precio_unitario'), output_field=dinero)),
+        costo_ventas=Coalesce(
+            Sum(ExpressionWrapper(F('cantidad') * F('producto__costo_compra'), output_field=dinero)),
+            Value(0, output_field=dinero),
+        ),
+    ).order_by()
+    ventas_por_categoria = {fila['producto__categoria_id']: fila for fila in ventas}
+
+    categorias = []
+    for fila in stock:
+        venta = ventas_por_categoria.get(fila['categoria_id'], {})
+        ingresos = venta.get('ingresos') or 0
+        costo_ventas = venta.get('costo_ventas') or 0
+        categorias.append({
+            'categoria': fila['categoria__nombre'] or 'Sin categoría',
+            'total_productos': fila['total_productos'],
+            'sin_costo': fila['sin_costo'],
+            'valor_stock': fila['valor_stock'],
+            'unidades_vendidas': venta.get('unidades_vendidas') or 0,
+            'ingresos': ingresos,
+            'costo_ventas': costo_ventas,
+            'margen_bruto': ingresos - costo_ventas,
+        })
+    categorias.sort(key=lambda c: c['categoria'])
+    return categorias
+
+
+def crear_cierre_inventario(fecha_inicio, fecha_fin, tamano_lote=1000):
+    """
+    Guarda en tablas el reporte de inventario por producto para el rango de fechas
+    (ej. cierre de mes). Las filas se insertan por lotes sin cargarlas todas en memoria.
+    El stock guardado es el actual, no el de fecha_fin (ver CierreInventario).
+    """
+    with transaction.atomic():
+        cierre = CierreInventario.objects.create(fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
+
+        lote = []
+        for fila in inventario_por_producto(fecha_inicio, fecha_fin, chunk_size=tamano_lote):
+            lote.append(DetalleCierreInventario(
+                cierre=cierre,
+                producto_id=fila['id'],
+                nombre_producto=fila['nombre'],
+                categoria=fila['categoria__nombre'] or '',
+                stock=fila['stock'],
+                valor_stock=fila['valor_stock'],
+                unidades_vendidas=fila['unidades_vendidas'],
+                ingresos=fila['ingresos'],
+                costo_ventas=fila['costo_ventas'],
+                margen_bruto=fila['margen_bruto'],
+            ))
+            if len(lote) >= tamano_lote:
+                DetalleCierreInventario.objects.bulk_create(lote)
+                lote = []
+        if lote:
+            DetalleCierreInventario.objects.bulk_create(lote)
+
+        totales = cierre.detalles.aggregate(
+            valor_stock=Sum('valor_stock'),
+            ingresos=Sum('ingresos'),
+            costo_ventas=Sum('costo_ventas'),
+            margen_bruto=Sum('margen_bruto'),
+        )
+        for campo, valor in totales.items():
+            setattr(cierre, campo, valor or 0)
+        cierre.save()
+    return cierre
@@ -4,19 +4,30 @@ import csv
 import io
 import json
 from django.shortcuts import render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.contrib import messages
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, View
 from django.contrib.auth.decorators import login_required
-from .models import Producto, Categoria, Venta, DetalleVenta
+from .models import Producto, Categoria, Venta, DetalleVenta, CierreInventario
 from django.utils import timezone
 from django.db.models import Sum, F
 from django.shortcuts import render, redirect
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.db import transaction
 from datetime import timedelta
-from .utils import enviar_notificacion_stock_cero
+from django.utils.dateparse import parse_date
+from .utils import (
+    enviar_notificacion_stock_cero,
+    obtener_estadisticas_categorias,
+    recategorizar_productos,
+    compilar_reglas_categoria,
+    asignar_categoria,
+    CATEGORIA_POR_DEFECTO,
+    inventario_por_producto,
+    inventario_por_categoria,
+    crear_cierre_inventario,
+)
 # ======================================================================
 # VISTAS DEL DASHBOARD Y AUTENTICACIÓN
 # ======================================================================
@@ -114,12 +125,16 @@ class ProductoCreateView(CreateView):
 
 class CategoriaListView(ListView):
     """
-    Vista para listar todas las categorías.
+    Vista para listar todas las categorías con sus estadísticas.
     """
     model = Categoria
     template_name = 'core/categoria_list.html'
     context_object_name = 'categorias'
 
+    def get_queryset(self):
+        # Conteo de productos, valor del stock e ingresos en una sola consulta (cacheada)
+        return obtener_estadisticas_categorias()
+
     # Restricción para que solo usuarios logueados accedan a la vista
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
@@ -150,6 +165,73 @@ class CategoriaDeleteView(DeleteView):
     success_url = reverse_lazy('core:categoria-list')
     login_url = reverse_lazy('login')
 
+
+class RecategorizarProductosView(View):
+    """
+    Mueve varios productos a otra categoría con un solo UPDATE.
+    Acepta una lista de ids (separados por coma) y/o un filtro por
+    categoría de origen y texto en el nombre.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            from django.contrib.auth.views import redirect_to_login
+            return redirect_to_login(self.request.get_full_path(), login_url='login')
+        return super().dispatch(request, *args, **kwargs)
+
+    @staticmethod
+    def parse_pk(texto):
+        """Convierte el texto en un id positivo; devuelve None si no es válido."""
+        try:
+            pk = int((texto or '').strip())
+        except ValueError:
+            return None
+        return pk if pk > 0 else None
+
+    def post(self, request, *args, **kwargs):
+        destino_pk = self.parse_pk(request.POST.get('categoria_destino'))
+        origen_texto = request.POST.get('categoria_origen', '').strip()
+        origen_pk = self.parse_pk(origen_texto)
+        textos_ids = [pk.strip() for pk in request.POST.get('ids', '').split(',') if pk.strip()]
+        ids = [self.parse_pk(pk) for pk in textos_ids]
+
+        # Validamos los datos antes de consultar para no devolver un error 500
+        if destino_pk is None:
+            messages.error(request, 'Selecciona una categoría destino válida.')
+            return redirect('core:categoria-list')
+        if origen_texto and origen_pk is None:
+            messages.error(request, 'La categoría de origen no es válida.')
+            return redirect('core:categoria-list')
+        invalidos = [texto for texto, pk in zip(textos_ids, ids) if pk is None]
+        if invalidos:
+            messages.error(request, f'Los siguientes IDs no son válidos: {", ".join(invalidos)}. Usa solo números separados por coma.')
+            return redirect('core:categoria-list')
+
+        categoria_destino = Categoria.objects.filter(pk=destino_pk).first()
+        if categoria_destino is None:
+            messages.error(request, 'La categoría destino no existe.')
+            return redirect('core:categoria-list')
+
+        categoria_origen = None
+        if origen_pk:
+            categoria_origen = Categoria.objects.filter(pk=origen_pk).first()
+            if categoria_origen is None:
+                messages.error(request, 'La categoría de origen no existe.')
+                return redirect('core:categoria-list')
+
+        try:
+            actualizados = recategorizar_productos(
+                categoria_destino,
+                ids=ids,
+                categoria_origen=categoria_origen,
+                nombre=request.POST.get('nombre', '').strip(),
+            )
+        except ValueError as e:
+            messages.error(request, f'No se pudo recategorizar: {e}')
+        else:
+            messages.success(request, f'{actualizados} producto(s) movido(s) a "{categoria_destino.nombre}".')
+
+        return redirect('core:categoria-list')
+
 class VentaView(View):
     def get(self, request, *args, **kwargs):
         productos = Producto.objects.filter(activo=True)
@@ -237,23 +319,30 @@ class UploadCSVView(View):
             csv_reader = csv.DictReader(io.StringIO(csv_data))
             
             try:
-                # Obtenemos o creamos las categorías
-                papeleria_cat, _ = Categoria.objects.get_or_create(nombre='Papelería')
-                dulces_cat, _ = Categoria.objects.get_or_create(nombre='Dulces')
+                # Toda la importación va en una transacción: si una fila falla no se
+                # guarda nada, y el caché de estadísticas se invalida una sola vez
+                with transaction.atomic():
+                    # Las reglas se compilan una sola vez por importación y las
+                    # categorías se obtienen o crean solo la primera vez que se usan
+                    reglas = compilar_reglas_categoria()
+                    categorias = {}
                 
-                for row in csv_reader:
-                    # Lógica para determinar la categoría
-                    categoria_producto = papeleria_cat
+                    for row in csv_reader:
+                        # Lógica para determinar la categoría
+                        nombre_categoria = asignar_categoria(row['Producto'], reglas, CATEGORIA_POR_DEFECTO)
+                        if nombre_categoria not in categorias:
+                            categorias[nombre_categoria], _ = Categoria.objects.get_or_create(nombre=nombre_categoria)
+                        categoria_producto = categorias[nombre_categoria]
                     
-                    Producto.objects.update_or_create(
-                        nombre=row['Producto'],
-                        defaults={
-                            'stock': int(row['Cantidad']),
-                            'costo_compra': float(row['Precio Unitario (Costo)'].replace('$', '').replace(',', '')),
-                            'precio_venta': float(row['Precio de Venta Unitario (30% Margen)'].replace('$', '').replace(',', '')),
-                            'categoria': categoria_producto,
-                        }
-                    )
+                        Producto.objects.update_or_create(
+                            nombre=row['Producto'],
+                            defaults={
+                                'stock': int(row['Cantidad']),
+                                'costo_compra': float(row['Precio Unitario (Costo)'].replace('$', '').replace(',', '')),
+                                'precio_venta': float(row['Precio de Venta Unitario (30% Margen)'].replace('$', '').replace(',', '')),
+                                'categoria': categoria_producto,
+                            }
+                        )
                 messages.success(request, '¡Productos cargados exitosamente!')
             except KeyError as e:
                 messages.error(request, f'Error en el formato del CSV. Falta la columna: {e}.')
@@ -296,4 +385,126 @@ class ReportesVentaView(View):
             'total_productos_vendidos': total_productos_vendidos,
         }
         
-        return render(request, 'core/reportes_ventas.html', contexto)
\ No newline at end of file
+        return render(request, 'core/reportes_ventas.html', contexto)
+
+
+class Echo:
+    """
+    Objeto tipo archivo que solo devuelve lo que se le escribe,
+    para que csv.writer genere filas en un StreamingHttpResponse.
+    """
+    def write(self, value):
+        return value
+
+
+class ReporteInventarioView(View):
+    """
+    Reporte de inventario y margen: valor del stock, costo de lo vendido y
+    margen bruto por categoría y por producto, calculados en la base de datos.
+    """
+    template_name = 'core/reporte_inventario.html'
+    columnas_csv = [
+        ('nombre', 'Producto'),
+        ('categoria__nombre', 'Categoría'),
+        ('stock', 'Stock'),
+        ('costo_compra', 'Costo Unitario'),
+        ('precio_venta', 'Precio de Venta'),
+        ('valor_stock', 'Valor del Stock'),
+        ('unidades_vendidas', 'Unidades Vendidas'),
+        ('ingresos', 'Ingresos'),
+        ('costo_ventas', 'Costo de lo Vendido'),
+        ('margen_bruto', 'Margen Bruto'),
+        ('sin_costo', 'Sin Costo de Compra'),
+    ]
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            from django.contrib.auth.views import redirect_to_login
+            return redirect_to_login(self.request.get_full_path(), login_url='login')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_rango_por_defecto(self):
+        # Valores iniciales para el reporte (últimos 30 días)
+        fecha_fin = timezone.now().date()
+        return fecha_fin - timedelta(days=30), fecha_fin
+
+    def get_rango_fechas(self, data):
+        """
+        Devuelve (fecha_inicio, fecha_fin, error). Si no se envían fechas se usa
+        el rango por defecto; si son inválidas o están invertidas, error trae el motivo.
+        """
+        texto_inicio = (data.get('fecha_inicio') or '').strip()
+        texto_fin = (data.get('fecha_fin') or '').strip()
+        if not texto_inicio and not texto_fin:
+            return (*self.get_rango_por_defecto(), None)
+
+        try:
+            fecha_inicio = parse_date(texto_inicio)
+            fecha_fin = parse_date(texto_fin)
+        except ValueError:
+            fecha_inicio = fecha_fin = None
+        if not fecha_inicio or not fecha_fin:
+            return None, None, 'Indica una fecha de inicio y una fecha de fin válidas.'
+        if fecha_inicio > fecha_fin:
+            return None, None, 'La fecha de inicio no puede ser posterior a la fecha de fin.'
+        return fecha_inicio, fecha_fin, None
+
+    def get(self, request, *args, **kwargs):
+        fecha_inicio, fecha_fin, error = self.get_rango_fechas(request.GET)
+
+        if error:
+            messages.error(request, error)
+            if request.GET.get('formato') == 'csv':
+                return redirect('core:reporte-inventario')
+            fecha_inicio, fecha_fin = self.get_rango_por_defecto()
+
+        if request.GET.get('formato') == 'csv':
+            return self.exportar_csv(fecha_inicio, fecha_fin)
+
+        categorias = inventario_por_categoria(fecha_inicio, fecha_fin)
+        totales = {
+            campo: sum(c[campo] for c in categorias)
+            for campo in ('valor_stock', 'ingresos', 'costo_ventas', 'margen_bruto', 'sin_costo')
+        }
+
+        contexto = {
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin,
+            'categorias': categorias,
+            'totales': totales,
+            'cierres': CierreInventario.objects.order_by('-fecha_creacion')[:10],
+        }
+        return render(request, self.template_name, contexto)
+
+    def post(self, request, *args, **kwargs):
+        """Guarda un cierre de inventario para el rango de fechas."""
+        # Un cierre solo se guarda para un periodo indicado explícitamente y válido
+        fecha_inicio, fecha_fin, error = self.get_rango_fechas(request.POST)
+        if not error and not (request.POST.get('fecha_inicio') and request.POST.get('fecha_fin')):
+            error = 'Indica la fecha de inicio y la fecha de fin del cierre.'
+        if error:
+            messages.error(request, f'No se guardó el cierre: {error}')
+            return redirect('core:reporte-inventario')
+
+        cierre = crear_cierre_inventario(fecha_inicio, fecha_fin)
+        messages.success(request, f'{cierre} guardado con éxito.')
+        return redirect(
+            f"{reverse('core:reporte-inventario')}?fecha_inicio={fecha_inicio:%Y-%m-%d}&fecha_fin={fecha_fin:%Y-%m-%d}"
+        )
+
+    def exportar_csv(self, fecha_inicio, fecha_fin):
+        """Devuelve el reporte por producto como CSV, fila por fila."""
+        writer = csv.writer(Echo())
+        filas = inventario_por_producto(fecha_inicio, fecha_fin)
+
+        def generar():
+            yield writer.writerow([titulo for _, titulo in self.columnas_csv])
+            for fila in filas:
+                fila['sin_costo'] = 'Sí' if fila['sin_costo'] else ''
+                yield writer.writerow([fila[campo] if fila[campo] is not None else '' for campo, _ in self.columnas_csv])
+
+        response = StreamingHttpResponse(generar(), content_type='text/csv')
+        response['Content-Disposition'] = (
+            f'attachment; filename="inventario_{fecha_inicio:%Y%m%d}_{fecha_fin:%Y%m%d}.csv"'
+        )
+        return response
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Mide el tiempo de arranque y la memoria de un worker para cada módulo de settings.
+
+Para cada módulo ejecuta `manage.py check` varias veces (tiempo de pared) y
+arranca un proceso que carga la aplicación WSGI para medir su RSS máximo.
+
+Con --ref se mide el proyecto tal como estaba en otro commit (se extrae con
+`git archive` a un directorio temporal), para comparar antes y después.
+
+Uso:
+    python benchmark_startup.py
+    python benchmark_startup.py --runs 10 papeleria.settings.dev papeleria.settings.prod
+    python benchmark_startup.py --ref e8b7a2a papeleria.settings
+"""
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+WORKER_RSS_CODE = """
+import resource, sys
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss está en KB en Linux y en bytes en macOS
+print(rss // 1024 if sys.platform == 'darwin' else rss)
+"""
+
+
+def extraer_ref(ref, destino):
+    """Extrae este proyecto tal como estaba en `ref` y devuelve su directorio."""
+    raiz = Path(subprocess.run(
+        ['git', 'rev-parse', '--show-toplevel'],
+        cwd=BASE_DIR, check=True, capture_output=True, text=True,
+    ).stdout.strip())
+    prefijo = BASE_DIR.relative_to(raiz).as_posix()
+    archivo = subprocess.run(
+        ['git', 'archive', '--format=tar', ref, prefijo],
+        cwd=raiz, check=True, capture_output=True,
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archivo)) as tar:
+        tar.extractall(destino, filter='data')
+    return Path(destino) / prefijo
+
+
+def medir_check(proyecto, settings_module, runs):
+    """Devuelve los tiempos (en segundos) de `manage.py check`."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    tiempos = []
+    for _ in range(runs):
+        inicio = time.perf_counter()
+        subprocess.run(
+            [sys.executable, 'manage.py', 'check'],
+            cwd=proyecto, env=env, check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def medir_rss_worker(proyecto, settings_module):
+    """Devuelve el RSS máximo (en KB) de un proceso que carga la aplicación WSGI."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    resultado = subprocess.run(
+        [sys.executable, '-c', WORKER_RSS_CODE],
+        cwd=proyecto, env=env, check=True,
+        capture_output=True, text=True,
+    )
+    return int(resultado.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('settings', nargs='*', default=['papeleria.settings.dev', 'papeleria.settings.prod'])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--ref', help='commit o rama a medir en lugar del árbol actual')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporal:
+        proyecto = extraer_ref(args.ref, temporal) if args.ref else BASE_DIR
+        print(f"proyecto: {args.ref or 'árbol actual'}")
+        print(f"{'settings':<28} {'check (mediana)':>16} {'check (min)':>12} {'RSS worker':>12}")
+        for settings_module in args.settings:
+            tiempos = medir_check(proyecto, settings_module, args.runs)
+            rss = medir_rss_worker(proyecto, settings_module)
+            print(
+                f"{settings_module:<28} {statistics.median(tiempos) * 1000:>13.0f} ms "
+                f"{min(tiempos) * 1000:>9.0f} ms {rss / 1024:>9.1f} MB"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 """
-Django settings for papeleria project.
+Base Django settings for papeleria project, shared by dev and prod.
 
 Generated by 'django-admin startproject' using Django 5.2.5.
 
@@ -11,31 +11,29 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from dotenv import load_dotenv
 import environ
 
-env = environ.Env()
-environ.Env.read_env()
-# Load environment variables from .env file
-load_dotenv()
-print("conectado")
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# Load environment variables from .env file (once, only if it exists)
+env = environ.Env()
+if (BASE_DIR / '.env').exists():
+    environ.Env.read_env(BASE_DIR / '.env')
 
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-^ct^2jtbvx&j2qv0-*p@*$rw1+(p^&&3wk)$14(wu-ri*s)f()"
+SECRET_KEY = env('DJANGO_SECRET_KEY', default="django-insecure-^ct^2jtbvx&j2qv0-*p@*$rw1+(p^&&3wk)$14(wu-ri*s)f()")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = False
 
 
 ALLOWED_HOSTS = ['127.0.0.1', 'localhost', '44f9c0b47cfb.ngrok-free.app', '*.ngrok.io']
 CSRF_TRUSTED_ORIGINS = ['https://*.ngrok.io', 'https://44f9c0b47cfb.ngrok-free.app']
-print("DEBUG: ALLOWED_HOSTS está configurado como:", ALLOWED_HOSTS)
 
 # Application definition
 
@@ -131,6 +129,7 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
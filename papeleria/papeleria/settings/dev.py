@@ -0,0 +1,18 @@
+"""
+Development settings for papeleria project.
+
+Use with DJANGO_SETTINGS_MODULE=papeleria.settings.dev (the default for manage.py).
+The extra tools in requirements-dev.txt are optional.
+"""
+
+from importlib.util import find_spec
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = True
+
+# Solo si están instaladas las dependencias de requirements-dev.txt
+if find_spec('django_extensions') is not None:
+    INSTALLED_APPS = INSTALLED_APPS + [
+        "django_extensions",
+    ]
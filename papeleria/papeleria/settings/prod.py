@@ -0,0 +1,50 @@
+"""
+Production settings for papeleria project.
+
+Use with DJANGO_SETTINGS_MODULE=papeleria.settings.prod (the default for wsgi/asgi).
+"""
+
+import copy
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = False
+
+SECRET_KEY = env('DJANGO_SECRET_KEY')
+ALLOWED_HOSTS = env.list('DJANGO_ALLOWED_HOSTS', default=ALLOWED_HOSTS)
+
+# Sin el context processor de debug. Con DEBUG=False y sin 'loaders' definidos,
+# Django ya usa el cached loader (plantillas compiladas una vez por proceso).
+# Se copia para no modificar la lista de base.py, que se comparte por el import *.
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    procesador for procesador in TEMPLATES[0]['OPTIONS']['context_processors']
+    if procesador != 'django.template.context_processors.debug'
+]
+
+# Caché compartido entre todos los workers, para que invalidar las estadísticas
+# en un proceso las invalide en todos. Crear la tabla con:
+#   python manage.py createcachetable --settings=papeleria.settings.prod
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'core_cache',
+    }
+}
+
+# Conexiones persistentes en lugar de abrir una por petición.
+DATABASES = copy.deepcopy(DATABASES)
+DATABASES['default']['CONN_MAX_AGE'] = env.int('DJANGO_CONN_MAX_AGE', default=60)
+
+# Nunca registrar las consultas SQL (con DEBUG=False Django ya no las guarda en memoria).
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'django': {'handlers': ['console'], 'level': 'WARNING'},
+        'django.db.backends': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}